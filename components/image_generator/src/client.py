@@ -14,7 +14,7 @@ import re
 import time
 import aiohttp
 import requests
-from typing import Dict, Any, Optional, List, Tuple, Set
+from typing import Dict, Any, Optional, List, Tuple, Set, AsyncIterator
 from datetime import datetime
 from requests import RequestException
 
@@ -28,6 +28,17 @@ from .utils import (MIDJOURNEY_APP_ID, DISCORD_API_URL, GATEWAY_URL,
 # Configure logging
 logger = logging.getLogger("midjourney_client")
 
+# Interactions endpoint used for slash commands and button clicks
+_INTERACTIONS_URL = f"{DISCORD_API_URL}/interactions"
+
+# Static fields of the Midjourney /imagine command; only the prompt option varies
+_IMAGINE_COMMAND = {
+    "version": "1237876415471554623",
+    "id": "938956540159881230",  # Midjourney imagine command ID
+    "name": "imagine",
+    "type": 1
+}
+
 
 class DiscordGateway:
     """Class to handle Discord gateway connections and event handling"""
@@ -819,7 +830,7 @@ class MidjourneyClient:
             }
         }
         
-        url = f"{DISCORD_API_URL}/interactions"
+        url = _INTERACTIONS_URL
         endpoint = "interactions"
         
         try:
@@ -828,8 +839,8 @@ class MidjourneyClient:
                 # Apply rate limiting
                 await self.rate_limiter.wait(endpoint)
                 
-                # Make the request
-                response = requests.post(url, headers=self.headers, json=payload)
+                # Make the request in a worker thread so the event loop keeps running
+                response = await asyncio.to_thread(requests.post, url, headers=self.headers, json=payload)
                 
                 # Update rate limit information
                 if 'X-RateLimit-Remaining' in response.headers:
@@ -1028,8 +1039,24 @@ class MidjourneyClient:
         Raises:
             MidjourneyError: On serious errors that affect all variants
         """
-        results = []
+        return [result async for result in self.iter_upscale_variants(grid_message_id)]
+
+    async def iter_upscale_variants(self, grid_message_id: str) -> AsyncIterator[UpscaleResult]:
+        """
+        Upscale all 4 variants from a grid, yielding each result as it completes
         
+        Consumers can stop iterating early (e.g. on the first failure) to skip
+        the remaining upscales.
+        
+        Args:
+            grid_message_id: The message ID of the grid to upscale
+            
+        Yields:
+            UpscaleResult: Result for each variant, in variant order
+            
+        Raises:
+            MidjourneyError: On serious errors that affect all variants
+        """
         # Make sure we're connected to bot gateway
         if not self.bot_gateway.connected.is_set():
             logger.warning("Bot gateway not connected, reconnecting...")
@@ -1064,120 +1091,123 @@ class MidjourneyClient:
         # Track which messages have been claimed by which variants
         self.matched_message_ids = set()
         
-        # Upscale each variant
-        for variant, custom_id in custom_ids.items():
-            logger.info(f"Upscaling variant U{variant}...")
+        # Upscale each variant. These stay sequential: result detection keys off
+        # current_upscale_variant and last_interaction_time, so only one upscale
+        # can be in flight per client at a time.
+        last_variant = max(custom_ids)
+        try:
+            for variant, custom_id in custom_ids.items():
+                logger.info(f"Upscaling variant U{variant}...")
             
-            # Track which variant we're currently upscaling
-            self.current_upscale_variant = variant
+                # Track which variant we're currently upscaling
+                self.current_upscale_variant = variant
             
-            # Store the timestamp when we start this specific upscale
-            self.last_interaction_time = time.time()
+                # Store the timestamp when we start this specific upscale
+                self.last_interaction_time = time.time()
             
-            # Create a future for this upscale
-            self.upscale_futures[variant] = asyncio.Future()
+                # Create a future for this upscale
+                self.upscale_futures[variant] = asyncio.Future()
             
-            try:
-                # Send the upscale interaction
                 try:
-                    if not await self._send_button_interaction(grid_message_id, custom_id):
-                        results.append(UpscaleResult(
+                    # Send the upscale interaction
+                    try:
+                        if not await self._send_button_interaction(grid_message_id, custom_id):
+                            yield UpscaleResult(
+                                success=False,
+                                variant=variant,
+                                error="Failed to send upscale interaction"
+                            )
+                            continue
+                    except MidjourneyError as e:
+                        # Capture specific interaction error
+                        yield UpscaleResult(
                             success=False,
                             variant=variant,
-                            error="Failed to send upscale interaction"
-                        ))
+                            error=f"Interaction error: {str(e)}"
+                        )
                         continue
-                except MidjourneyError as e:
-                    # Capture specific interaction error
-                    results.append(UpscaleResult(
-                        success=False,
-                        variant=variant,
-                        error=f"Interaction error: {str(e)}"
-                    ))
-                    continue
                     
-                # Start parallel detection approaches
-                # 1. WebSocket approach - wait for the upscale event
-                websocket_task = asyncio.create_task(
-                    asyncio.wait_for(self.upscale_futures[variant], timeout=30)
-                )
+                    # Start parallel detection approaches
+                    # 1. WebSocket approach - wait for the upscale event
+                    websocket_task = asyncio.create_task(
+                        asyncio.wait_for(self.upscale_futures[variant], timeout=30)
+                    )
                 
-                # 2. REST API polling approach - now including variant-specific timestamp
-                rest_task = asyncio.create_task(self._fallback_get_upscale_result(variant))
+                    # 2. REST API polling approach - now including variant-specific timestamp
+                    rest_task = asyncio.create_task(self._fallback_get_upscale_result(variant))
                 
-                # Wait for either approach to succeed
-                done, pending = await asyncio.wait(
-                    [websocket_task, rest_task],
-                    return_when=asyncio.FIRST_COMPLETED
-                )
+                    # Wait for either approach to succeed
+                    done, pending = await asyncio.wait(
+                        [websocket_task, rest_task],
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
                 
-                # Cancel any pending tasks
-                for task in pending:
-                    task.cancel()
+                    # Cancel any pending tasks
+                    for task in pending:
+                        task.cancel()
                 
-                # Process results
-                image_url = None
-                for task in done:
-                    try:
-                        result = await task
-                        if result:
-                            image_url = result
-                            break
-                    except asyncio.TimeoutError:
-                        logger.warning(f"Timeout in upscale detection task for U{variant}")
-                    except Exception as e:
-                        logger.error(f"Error in upscale detection task: {e}")
+                    # Process results
+                    image_url = None
+                    for task in done:
+                        try:
+                            result = await task
+                            if result:
+                                image_url = result
+                                break
+                        except asyncio.TimeoutError:
+                            logger.warning(f"Timeout in upscale detection task for U{variant}")
+                        except Exception as e:
+                            logger.error(f"Error in upscale detection task: {e}")
                 
-                if image_url:
-                    results.append(UpscaleResult(
-                        success=True,
-                        variant=variant,
-                        image_url=image_url
-                    ))
-                else:
-                    # One more attempt with the original fallback as last resort
-                    try:
-                        image_url = await self._fallback_get_upscale_result(variant)
-                        if image_url:
-                            results.append(UpscaleResult(
-                                success=True,
-                                variant=variant,
-                                image_url=image_url
-                            ))
-                        else:
-                            results.append(UpscaleResult(
+                    if image_url:
+                        yield UpscaleResult(
+                            success=True,
+                            variant=variant,
+                            image_url=image_url
+                        )
+                    else:
+                        # One more attempt with the original fallback as last resort
+                        try:
+                            image_url = await self._fallback_get_upscale_result(variant)
+                            if image_url:
+                                yield UpscaleResult(
+                                    success=True,
+                                    variant=variant,
+                                    image_url=image_url
+                                )
+                            else:
+                                yield UpscaleResult(
+                                    success=False,
+                                    variant=variant,
+                                    error="Failed to detect upscale completion"
+                                )
+                        except MidjourneyError as e:
+                            yield UpscaleResult(
                                 success=False,
                                 variant=variant,
-                                error="Failed to detect upscale completion"
-                            ))
-                    except MidjourneyError as e:
-                        results.append(UpscaleResult(
-                            success=False,
-                            variant=variant,
-                            error=f"Fallback error: {str(e)}"
-                        ))
-            except Exception as e:
-                logger.error(f"Error in upscale process: {e}")
-                results.append(UpscaleResult(
-                    success=False,
-                    variant=variant,
-                    error=f"Exception during upscale: {str(e)}"
-                ))
-            finally:
-                # Clear the future
-                if variant in self.upscale_futures:
-                    if not self.upscale_futures[variant].done():
-                        self.upscale_futures[variant].cancel()
-                    del self.upscale_futures[variant]
-            
-            # Add a delay between upscales to ensure they don't interfere with each other
-            # This also helps with rate limiting
-            await asyncio.sleep(8)
-        
-        # Reset tracking
-        self.current_upscale_variant = None
-        
-        return results
+                                error=f"Fallback error: {str(e)}"
+                            )
+                except Exception as e:
+                    logger.error(f"Error in upscale process: {e}")
+                    yield UpscaleResult(
+                        success=False,
+                        variant=variant,
+                        error=f"Exception during upscale: {str(e)}"
+                    )
+                finally:
+                    # Clear the future
+                    if variant in self.upscale_futures:
+                        if not self.upscale_futures[variant].done():
+                            self.upscale_futures[variant].cancel()
+                        del self.upscale_futures[variant]
+            
+                # Add a delay between upscales to ensure they don't interfere with each other
+                # This also helps with rate limiting (nothing follows the last variant)
+                if variant != last_variant:
+                    await asyncio.sleep(8)
+        finally:
+            # Reset tracking, even if the consumer stops iterating early
+            self.current_upscale_variant = None
 
     async def _fallback_get_upscale_result(self, variant, start_time=None, grid_message_id=None) -> Optional[str]:
         """
@@ -1426,7 +1456,7 @@ class MidjourneyClient:
             "data": command
         }
         
-        url = f"{DISCORD_API_URL}/interactions"
+        url = _INTERACTIONS_URL
         endpoint = "interactions"
         
         try:
@@ -1439,10 +1469,12 @@ class MidjourneyClient:
                 self.last_interaction_time = time.time()
 
                 # Debug log the actual payload being sent
-                logger.debug(f"Sending interaction payload to {url}: {json.dumps(payload, indent=2)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Sending interaction payload to {url}: {json.dumps(payload, indent=2)}")
 
-                # Use synchronous requests library for simplicity and reliability
-                response = requests.post(url, headers=self.headers, json=payload)
+                # Run the blocking requests call in a worker thread so gateway
+                # heartbeats and other pending tasks aren't stalled
+                response = await asyncio.to_thread(requests.post, url, headers=self.headers, json=payload)
                 
                 # Update rate limits based on headers
                 if 'X-RateLimit-Remaining' in response.headers:
@@ -1507,10 +1539,7 @@ class MidjourneyClient:
         """
         # Prepare the command data
         command = {
-            "version": "1237876415471554623",
-            "id": "938956540159881230",  # Midjourney imagine command ID
-            "name": "imagine",
-            "type": 1,
+            **_IMAGINE_COMMAND,
             "options": [
                 {
                     "type": 3,
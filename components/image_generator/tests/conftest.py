@@ -81,6 +81,18 @@ def discord_credentials_available():
     """Check if Discord credentials are available for testing"""
     return all([USER_TOKEN, BOT_TOKEN, CHANNEL_ID, GUILD_ID])
 
+@pytest.fixture(scope="session")
+def mock_response_factory():
+    """Provide a factory that builds mock requests responses"""
+    def make(status=200, body=None, headers=None):
+        response = MagicMock()
+        response.status_code = status
+        response.json.return_value = body or {}
+        response.text = json.dumps(body) if body else ""
+        response.headers = headers or {'X-RateLimit-Remaining': '10'}
+        return response
+    return make
+
 @pytest.fixture
 def mock_gateway():
     """Create a mock Discord gateway for testing"""
@@ -156,9 +168,9 @@ async def midjourney_client(discord_credentials_available):
 # Setup mock mode
 if MOCK_MODE:
     # Apply global patches for tests running in mock mode
-    @pytest.fixture(autouse=True)
-    def mock_aiohttp_session(monkeypatch):
-        """Mock aiohttp ClientSession to prevent actual HTTP requests"""
+    @pytest.fixture(scope="module", autouse=True)
+    def mock_aiohttp_session():
+        """Mock aiohttp ClientSession to prevent actual HTTP requests, once per module"""
         async def mock_get(*args, **kwargs):
             mock_resp = MagicMock()
             mock_resp.status = 200
@@ -176,5 +188,8 @@ if MOCK_MODE:
             mock_resp.__aexit__ = AsyncMock(return_value=None)
             return mock_resp
             
-        monkeypatch.setattr('aiohttp.ClientSession.get', mock_get)
-        monkeypatch.setattr('aiohttp.ClientSession.post', mock_post) 
\ No newline at end of file
+        # Each call still builds a fresh response, so sharing the patch is safe
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr('aiohttp.ClientSession.get', mock_get)
+            mp.setattr('aiohttp.ClientSession.post', mock_post)
+            yield 
\ No newline at end of file
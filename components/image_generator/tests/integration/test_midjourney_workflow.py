@@ -9,12 +9,13 @@ including different model versions and aspect ratios.
 import os
 import sys
 import json
+import time
 import asyncio
 import argparse
 import logging
+from contextlib import asynccontextmanager, nullcontext
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
-from unittest.mock import AsyncMock
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator, NamedTuple
 
 # Add the src directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
@@ -22,29 +23,90 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 # Import from the image_generator modules
 from src.client import MidjourneyClient
 from src.models import GenerationResult, UpscaleResult
+from src.utils import RateLimiter
 
 # Import from test_adapter using a relative import
 from .adapter import TestMidjourneyClient, TestGenerationResult
 
 # Import test utilities
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from utils import load_env_vars, save_test_results
+from utils import load_env_vars, save_test_results, append_test_result, MOCK_ENV_VARS
 from test_config import get_test_cases, TIMING, ASPECT_RATIOS, MODEL_VERSIONS
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(name)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 logger = logging.getLogger("integration_test")
 
+# Maximum number of tests in flight at once. The client tracks a single pending
+# generation/upscale, so tests sharing one client default to running one at a time.
+TEST_CONCURRENCY = int(os.environ.get("MJ_TEST_CONCURRENCY", "1"))
+
+# Number of variants in a Midjourney grid, all of which must upscale
+EXPECTED_UPSCALES = 4
+
+class _ClientArgs(NamedTuple):
+    """Discord credentials in TestMidjourneyClient constructor order"""
+    user_token: str
+    bot_token: str
+    channel_id: str
+    guild_id: str
+
+def _client_args(env_vars: Dict[str, str]) -> _ClientArgs:
+    """Extract the client credentials from the environment variables once"""
+    return _ClientArgs(
+        env_vars["DISCORD_USER_TOKEN"],
+        env_vars["DISCORD_BOT_TOKEN"],
+        env_vars["DISCORD_CHANNEL_ID"],
+        env_vars["DISCORD_GUILD_ID"]
+    )
+
+@asynccontextmanager
+async def managed_client(env_vars: Dict[str, str]) -> AsyncIterator[TestMidjourneyClient]:
+    """
+    Create and initialize a TestMidjourneyClient, closing it on exit
+    
+    Args:
+        env_vars: Environment variables
+        
+    Yields:
+        Initialized TestMidjourneyClient
+    """
+    # Initialize client with our test adapter
+    client = TestMidjourneyClient(*_client_args(env_vars))
+    
+    try:
+        await client.initialize()
+        yield client
+    finally:
+        # Ensure client is closed
+        await client.close()
+
+def _client_context(env_vars: Dict[str, str], client: Optional[TestMidjourneyClient]):
+    """Reuse the given client, or open a managed one if none was passed"""
+    return nullcontext(client) if client is not None else managed_client(env_vars)
+
+def _write_urls(output_dir: str, test_id: str, grid_url: str, upscale_urls: List[Tuple[int, str]]) -> None:
+    """
+    Write the grid and upscale image URLs to files for manual inspection
+    
+    Args:
+        output_dir: Directory to save the URL files in
+        test_id: Unique test identifier
+        grid_url: URL of the generated grid image
+        upscale_urls: List of (variant position, URL) pairs for successful upscales
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, f"{test_id}_grid.png.url"), 'w') as f:
+        f.write(grid_url)
+    for i, url in upscale_urls:
+        with open(os.path.join(output_dir, f"{test_id}_upscale_{i}.png.url"), 'w') as f:
+            f.write(url)
+
 async def run_single_test(
     client: TestMidjourneyClient, 
     prompt: str, 
     test_id: str,
     save_images: bool = True,
-    output_dir: Optional[str] = None
+    output_dir: Optional[str] = None,
+    verbose: bool = True
 ) -> Dict[str, Any]:
     """
     Run a single generation and upscale test
@@ -55,19 +117,21 @@ async def run_single_test(
         test_id: Unique test identifier
         save_images: Whether to save the generated images
         output_dir: Directory to save images in
+        verbose: Include per-variant upscale details; when False only the
+            upscale counters are reported
         
     Returns:
         Dictionary with test results
     """
-    logger.info(f"Test {test_id}: Starting generation with prompt: {prompt}")
+    logger.info("Test %s: Starting generation with prompt: %s", test_id, prompt)
     
-    start_time = datetime.now()
+    start_time = time.monotonic()
     
     # Generate the initial grid
     gen_result = await client.generate(prompt)
     
     if not gen_result.success:
-        logger.error(f"Test {test_id}: Generation failed: {gen_result.error}")
+        logger.error("Test %s: Generation failed: %s", test_id, gen_result.error)
         return {
             "test_id": test_id,
             "prompt": prompt,
@@ -75,36 +139,38 @@ async def run_single_test(
             "generation_success": False,
             "stage": "generation",
             "error": gen_result.error,
-            "duration_seconds": (datetime.now() - start_time).total_seconds()
+            "duration_seconds": time.monotonic() - start_time
         }
     
-    logger.info(f"Test {test_id}: Generation successful, grid available at {gen_result.image_url}")
-    
-    # Save grid image if requested
-    grid_path = None
-    if save_images and output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-        grid_path = os.path.join(output_dir, f"{test_id}_grid.png")
-        # Save image URL to file for manual inspection
-        with open(grid_path + '.url', 'w') as f:
-            f.write(gen_result.image_url)
+    logger.info("Test %s: Generation successful, grid available at %s", test_id, gen_result.image_url)
     
-    # Upscale all variants
-    logger.info(f"Test {test_id}: Upscaling all variants")
-    upscale_results = await client.upscale_all_variants(gen_result.message_id)
+    # Upscale all variants, summarizing each result as it completes
+    logger.info("Test %s: Upscaling all variants", test_id)
+    variants_out = []
+    upscale_urls = []
+    successes = 0
+    total = 0
+    async for upscale in client.iter_upscale_variants(gen_result.message_id):
+        total += 1
+        ok = upscale.success
+        if ok:
+            successes += 1
+            upscale_urls.append((total, upscale.image_url))
+        if verbose:
+            variants_out.append({
+                "variant": upscale.variant,
+                "success": ok,
+                "image_url": upscale.image_url if ok else None,
+                "error": None if ok else upscale.error
+            })
+    # A run that upscaled fewer variants than the grid holds is a failure
+    upscale_success = total == EXPECTED_UPSCALES and successes == total
+    if total != EXPECTED_UPSCALES:
+        logger.error("Test %s: Expected %d upscales, got %d", test_id, EXPECTED_UPSCALES, total)
     
-    upscale_success = all(result.success for result in upscale_results)
-    
-    # Save upscaled images if requested
-    upscale_paths = []
+    # Save grid and upscaled image URLs if requested, off the event loop
     if save_images and output_dir:
-        for i, result in enumerate(upscale_results, 1):
-            if result.success:
-                upscale_path = os.path.join(output_dir, f"{test_id}_upscale_{i}.png")
-                upscale_paths.append(upscale_path)
-                # Save image URL to file for manual inspection
-                with open(upscale_path + '.url', 'w') as f:
-                    f.write(result.image_url)
+        await asyncio.to_thread(_write_urls, output_dir, test_id, gen_result.image_url, upscale_urls)
     
     # Prepare result dictionary
     result = {
@@ -114,29 +180,94 @@ async def run_single_test(
         "generation_success": gen_result.success,
         "generation_message_id": gen_result.message_id,
         "grid_image_url": gen_result.image_url,
-        "upscale_results": [
-            {
-                "variant": result.variant,
-                "success": result.success,
-                "image_url": result.image_url if result.success else None,
-                "error": result.error if not result.success else None
-            }
-            for result in upscale_results
-        ],
-        "upscale_success_rate": sum(1 for r in upscale_results if r.success) / len(upscale_results),
-        "duration_seconds": (datetime.now() - start_time).total_seconds()
+        "upscale_success_count": successes,
+        "upscale_total": total,
+        "upscale_success_rate": successes / total if total else 0.0,
+        "duration_seconds": time.monotonic() - start_time
     }
+    if verbose:
+        result["upscale_results"] = variants_out
     
-    logger.info(f"Test {test_id}: Completed in {result['duration_seconds']:.2f} seconds")
-    logger.info(f"Test {test_id}: Overall success: {result['success']}")
+    logger.info("Test %s: Completed in %.2f seconds", test_id, result["duration_seconds"])
+    logger.info("Test %s: Overall success: %s", test_id, result["success"])
     
     return result
 
+async def run_tests_concurrently(
+    client: TestMidjourneyClient,
+    test_cases: List[Tuple[str, str]],
+    save_images: bool = True,
+    output_dir: Optional[str] = None,
+    results_path: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run a batch of tests concurrently, bounded by TEST_CONCURRENCY
+    
+    Test starts are spaced at least TIMING['delay_between_tests'] apart, so
+    gathered tests pace themselves against the rate limit instead of sleeping
+    after every test.
+    
+    Args:
+        client: Initialized TestMidjourneyClient
+        test_cases: List of (test_id, prompt) pairs
+        save_images: Whether to save the generated images
+        output_dir: Directory to save images in
+        results_path: JSONL file each result is appended to as soon as its
+            test finishes, so partial runs are recoverable (optional)
+        
+    Returns:
+        List of test result dictionaries, in the same order as test_cases
+    """
+    semaphore = asyncio.Semaphore(max(1, TEST_CONCURRENCY))
+    rate_limiter = RateLimiter(base_delay=TIMING['delay_between_tests'])
+    rate_limiter_lock = asyncio.Lock()
+    results_lock = asyncio.Lock()
+    
+    async def run_one(test_id: str, prompt: str) -> Dict[str, Any]:
+        async with semaphore:
+            # Serialize waiters so each one sees the previous start time
+            async with rate_limiter_lock:
+                await rate_limiter.wait()
+            try:
+                result = await run_single_test(
+                    client=client,
+                    prompt=prompt,
+                    test_id=test_id,
+                    save_images=save_images,
+                    output_dir=output_dir
+                )
+            except Exception as e:
+                logger.error("Test %s: Unexpected error: %s", test_id, e)
+                result = {
+                    "test_id": test_id,
+                    "prompt": prompt,
+                    "success": False,
+                    "stage": "exception",
+                    "error": str(e)
+                }
+        
+        # Persist the result right away so a crash doesn't lose finished tests
+        if results_path:
+            async with results_lock:
+                await asyncio.to_thread(append_test_result, results_path, result)
+        return result
+    
+    return await asyncio.gather(*(run_one(test_id, prompt) for test_id, prompt in test_cases))
+
+def _summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a test result to the fields needed for the run summary"""
+    return {
+        "test_id": result["test_id"],
+        "success": result["success"],
+        "duration_seconds": result.get("duration_seconds")
+    }
+
 async def run_model_version_tests(
     env_vars: Dict[str, str],
     model_versions: List[str] = None,
     num_tests: int = 1,
-    save_images: bool = True
+    save_images: bool = True,
+    client: Optional[TestMidjourneyClient] = None
 ) -> Dict[str, Any]:
     """
     Run tests with different model versions
@@ -146,6 +277,7 @@ async def run_model_version_tests(
         model_versions: List of model versions to test
         num_tests: Number of tests per model version
         save_images: Whether to save images
+        client: Initialized client to reuse (a new one is managed if omitted)
         
     Returns:
         Dictionary with test results
@@ -153,61 +285,42 @@ async def run_model_version_tests(
     if not model_versions:
         model_versions = list(MODEL_VERSIONS.keys())
     
-    # Initialize client with our test adapter
-    client = TestMidjourneyClient(
-        user_token=env_vars["DISCORD_USER_TOKEN"],
-        bot_token=env_vars["DISCORD_BOT_TOKEN"],
-        channel_id=env_vars["DISCORD_CHANNEL_ID"],
-        guild_id=env_vars["DISCORD_GUILD_ID"]
-    )
-    
-    try:
-        await client.initialize()
-        
-        results = []
+    async with _client_context(env_vars, client) as client:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_dir = f"test_results/model_versions_{timestamp}"
         
-        # Run tests for each model version
-        for model in model_versions:
-            logger.info(f"Testing model version: {model}")
-            
-            # Get test cases for this model
-            test_cases = get_test_cases(category="simple", count=num_tests, model=model)
-            
-            for i, test_case in enumerate(test_cases):
-                test_id = f"model_{model}_{i+1}"
-                
-                # Run the test
-                result = await run_single_test(
-                    client=client,
-                    prompt=test_case["full_prompt"],
-                    test_id=test_id,
-                    save_images=save_images,
-                    output_dir=output_dir
-                )
-                
-                results.append(result)
-                
-                # Wait between tests to avoid rate limiting
-                if i < len(test_cases) - 1:
-                    logger.info(f"Waiting {TIMING['delay_between_tests']} seconds before next test...")
-                    await asyncio.sleep(TIMING['delay_between_tests'])
+        # Get test cases for every model version in one go
+        all_cases = {
+            model: get_test_cases(category="simple", count=num_tests, model=model)
+            for model in model_versions
+        }
+        test_cases = [
+            (f"model_{model}_{i+1}", test_case["full_prompt"])
+            for model, cases in all_cases.items()
+            for i, test_case in enumerate(cases)
+        ]
+        logger.info("Testing model versions: %s", ', '.join(model_versions))
         
-        # Save and return all results
-        save_test_results("model_version_tests", {"results": results}, output_dir)
-        return {"results": results}
+        # Run the tests, streaming each result to JSONL as it finishes
+        results_path = os.path.join(output_dir, "results.jsonl")
+        results = await run_tests_concurrently(
+            client, test_cases, save_images, output_dir, results_path
+        )
         
-    finally:
-        # Ensure client is closed
-        await client.close()
+        # Save a compact summary next to the full per-test records
+        save_test_results("model_version_tests", {
+            "results_file": results_path,
+            "results": [_summarize_result(r) for r in results]
+        }, output_dir)
+        return {"results": results}
 
 async def run_aspect_ratio_tests(
     env_vars: Dict[str, str],
     aspect_ratios: List[str] = None,
     model: str = "v6",
     num_tests: int = 1,
-    save_images: bool = True
+    save_images: bool = True,
+    client: Optional[TestMidjourneyClient] = None
 ) -> Dict[str, Any]:
     """
     Run tests with different aspect ratios
@@ -218,6 +331,7 @@ async def run_aspect_ratio_tests(
         model: Model version to use
         num_tests: Number of tests per aspect ratio
         save_images: Whether to save images
+        client: Initialized client to reuse (a new one is managed if omitted)
         
     Returns:
         Dictionary with test results
@@ -225,66 +339,47 @@ async def run_aspect_ratio_tests(
     if not aspect_ratios:
         aspect_ratios = list(ASPECT_RATIOS.keys())
     
-    # Initialize client with our test adapter
-    client = TestMidjourneyClient(
-        user_token=env_vars["DISCORD_USER_TOKEN"],
-        bot_token=env_vars["DISCORD_BOT_TOKEN"],
-        channel_id=env_vars["DISCORD_CHANNEL_ID"],
-        guild_id=env_vars["DISCORD_GUILD_ID"]
-    )
-    
-    try:
-        await client.initialize()
-        
-        results = []
+    async with _client_context(env_vars, client) as client:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_dir = f"test_results/aspect_ratios_{timestamp}"
         
-        # Run tests for each aspect ratio
-        for aspect_ratio in aspect_ratios:
-            logger.info(f"Testing aspect ratio: {aspect_ratio}")
-            
-            # Get test cases for this aspect ratio
-            test_cases = get_test_cases(
+        # Get test cases for every aspect ratio in one go
+        all_cases = {
+            aspect_ratio: get_test_cases(
                 category="simple", 
                 count=num_tests, 
                 model=model,
                 aspect_ratio=aspect_ratio
             )
-            
-            for i, test_case in enumerate(test_cases):
-                test_id = f"aspect_{aspect_ratio}_{i+1}"
-                
-                # Run the test
-                result = await run_single_test(
-                    client=client,
-                    prompt=test_case["full_prompt"],
-                    test_id=test_id,
-                    save_images=save_images,
-                    output_dir=output_dir
-                )
-                
-                results.append(result)
-                
-                # Wait between tests to avoid rate limiting
-                if i < len(test_cases) - 1:
-                    logger.info(f"Waiting {TIMING['delay_between_tests']} seconds before next test...")
-                    await asyncio.sleep(TIMING['delay_between_tests'])
+            for aspect_ratio in aspect_ratios
+        }
+        test_cases = [
+            (f"aspect_{aspect_ratio}_{i+1}", test_case["full_prompt"])
+            for aspect_ratio, cases in all_cases.items()
+            for i, test_case in enumerate(cases)
+        ]
+        logger.info("Testing aspect ratios: %s", ', '.join(aspect_ratios))
         
-        # Save and return all results
-        save_test_results("aspect_ratio_tests", {"results": results}, output_dir)
-        return {"results": results}
+        # Run the tests, streaming each result to JSONL as it finishes
+        results_path = os.path.join(output_dir, "results.jsonl")
+        results = await run_tests_concurrently(
+            client, test_cases, save_images, output_dir, results_path
+        )
         
-    finally:
-        # Ensure client is closed
-        await client.close()
+        # Save a compact summary next to the full per-test records
+        save_test_results("aspect_ratio_tests", {
+            "results_file": results_path,
+            "results": [_summarize_result(r) for r in results]
+        }, output_dir)
+        return {"results": results}
 
 async def run_comprehensive_test(
     env_vars: Dict[str, str],
     model: str = "v6",
     aspect_ratio: Optional[str] = None,
     prompt: Optional[str] = None,
-    save_images: bool = True
+    save_images: bool = True,
+    client: Optional[TestMidjourneyClient] = None
 ) -> Dict[str, Any]:
     """
     Run a single comprehensive test with detailed logging and verification
@@ -295,25 +390,16 @@ async def run_comprehensive_test(
         aspect_ratio: Aspect ratio to use (optional)
         prompt: Custom prompt to use (optional)
         save_images: Whether to save images
+        client: Initialized client to reuse (a new one is managed if omitted)
         
     Returns:
         Dictionary with test results
     """
-    # Initialize client with our test adapter
-    client = TestMidjourneyClient(
-        user_token=env_vars["DISCORD_USER_TOKEN"],
-        bot_token=env_vars["DISCORD_BOT_TOKEN"],
-        channel_id=env_vars["DISCORD_CHANNEL_ID"],
-        guild_id=env_vars["DISCORD_GUILD_ID"]
-    )
-    
     # Set up logging
     client_logger = logging.getLogger("complete_midjourney_workflow")
     client_logger.setLevel(logging.DEBUG)
     
-    try:
-        await client.initialize()
-        
+    async with _client_context(env_vars, client) as client:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_dir = f"test_results/comprehensive_{timestamp}"
         
@@ -349,14 +435,67 @@ async def run_comprehensive_test(
         # Save and return the result
         save_test_results("comprehensive_test", result, output_dir)
         return result
+
+async def run_all_tests(
+    env_vars: Dict[str, str],
+    model: str = "v6",
+    aspect_ratio: Optional[str] = None,
+    prompt: Optional[str] = None,
+    num_tests: int = 1,
+    save_images: bool = True
+) -> Dict[str, Any]:
+    """
+    Run the model, aspect ratio and comprehensive tests over one shared client
+    
+    Args:
+        env_vars: Environment variables
+        model: Model version to use
+        aspect_ratio: Aspect ratio to use (optional)
+        prompt: Custom prompt to use for the comprehensive test (optional)
+        num_tests: Number of tests per configuration
+        save_images: Whether to save images
         
-    finally:
-        # Ensure client is closed
-        await client.close()
+    Returns:
+        Dictionary with the results of each test type
+    """
+    async with managed_client(env_vars) as client:
+        return {
+            "model": await run_model_version_tests(
+                env_vars=env_vars,
+                model_versions=[model],
+                num_tests=num_tests,
+                save_images=save_images,
+                client=client
+            ),
+            "aspect": await run_aspect_ratio_tests(
+                env_vars=env_vars,
+                aspect_ratios=[aspect_ratio] if aspect_ratio else None,
+                model=model,
+                num_tests=num_tests,
+                save_images=save_images,
+                client=client
+            ),
+            "comprehensive": await run_comprehensive_test(
+                env_vars=env_vars,
+                model=model,
+                aspect_ratio=aspect_ratio,
+                prompt=prompt,
+                save_images=save_images,
+                client=client
+            )
+        }
 
 if __name__ == "__main__":
+    # Configure logging only when run as a script, unless already configured
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(name)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+    
     parser = argparse.ArgumentParser(description="Run integration tests for Midjourney workflow")
-    parser.add_argument("--test-type", type=str, choices=["model", "aspect", "comprehensive"], 
+    parser.add_argument("--test-type", type=str, choices=["model", "aspect", "comprehensive", "all"], 
                         default="comprehensive", help="Type of test to run")
     parser.add_argument("--model", type=str, choices=list(MODEL_VERSIONS.keys()), 
                         default="v6", help="Model version to use")
@@ -398,53 +537,64 @@ if __name__ == "__main__":
             prompt=args.prompt,
             save_images=args.save_images
         ))
+    elif args.test_type == "all":
+        asyncio.run(run_all_tests(
+            env_vars=env_vars,
+            model=args.model,
+            aspect_ratio=args.aspect_ratio,
+            prompt=args.prompt,
+            num_tests=args.num_tests,
+            save_images=args.save_images
+        ))
 
 # Add pytest-compatible test functions
 import pytest
 
+def _returns(value):
+    """Build a plain coroutine function returning value, lighter than AsyncMock"""
+    async def _stub(*args, **kwargs):
+        return value
+    return _stub
+
+def _yields(values):
+    """Build an async generator function yielding each of values"""
+    async def _stub(*args, **kwargs):
+        for value in values:
+            yield value
+    return _stub
+
 @pytest.mark.asyncio
 async def test_run_single_test_mock():
     """Test the run_single_test function with a mock client"""
     # Create a mock client
-    env_vars = load_env_vars()
-    if not env_vars:
-        # Use dummy values if no env vars are available
-        env_vars = {
-            "DISCORD_USER_TOKEN": "mock_user_token",
-            "DISCORD_BOT_TOKEN": "mock_bot_token",
-            "DISCORD_CHANNEL_ID": "123456789",
-            "DISCORD_GUILD_ID": "987654321"
-        }
+    # Use dummy values if no env vars are available
+    env_vars = load_env_vars() or MOCK_ENV_VARS
     
     # Initialize the test client
-    client = TestMidjourneyClient(
-        user_token=env_vars.get("DISCORD_USER_TOKEN", "mock_token"),
-        bot_token=env_vars.get("DISCORD_BOT_TOKEN", "mock_token"),
-        channel_id=env_vars.get("DISCORD_CHANNEL_ID", "123456789"),
-        guild_id=env_vars.get("DISCORD_GUILD_ID", "987654321")
-    )
+    client = TestMidjourneyClient(*_client_args(env_vars))
     
     # Monkey patch the client to return mock responses
-    client.generate = AsyncMock(return_value=TestGenerationResult(
+    client.generate = _returns(TestGenerationResult(
         success=True,
         message_id="mock_message_id_123",
         image_url="https://example.com/mock_image.png"
     ))
-    client.upscale_all_variants = AsyncMock(return_value=[
+    client.iter_upscale_variants = _yields([
         TestGenerationResult(success=True, variant=1, image_url="https://example.com/upscale1.png"),
         TestGenerationResult(success=True, variant=2, image_url="https://example.com/upscale2.png"),
         TestGenerationResult(success=True, variant=3, image_url="https://example.com/upscale3.png"),
         TestGenerationResult(success=True, variant=4, image_url="https://example.com/upscale4.png")
     ])
-    client.initialize = AsyncMock(return_value=True)
-    client.close = AsyncMock(return_value=True)
+    client.initialize = _returns(True)
+    client.close = _returns(True)
     
     # Run a single test
     result = await run_single_test(
         client=client,
         prompt="test prompt for mock run",
         test_id="mock_test_123",
-        save_images=False
+        save_images=False,
+        verbose=False
     )
     
     # Check results
@@ -452,5 +602,37 @@ async def test_run_single_test_mock():
     assert result["generation_success"] is True
     assert result["generation_message_id"] == "mock_message_id_123"
     assert result["grid_image_url"] == "https://example.com/mock_image.png"
-    assert len(result["upscale_results"]) == 4
-    assert result["upscale_success_rate"] == 1.0  # All successful 
\ No newline at end of file
+    assert result["upscale_success_count"] == 4
+    assert result["upscale_total"] == 4
+    assert "upscale_results" not in result
+    assert result["upscale_success_rate"] == 1.0  # All successful
+
+@pytest.mark.asyncio
+async def test_run_single_test_no_upscales_mock():
+    """Test that run_single_test fails when no variants are upscaled"""
+    # Initialize the test client with dummy values if no env vars are available
+    env_vars = load_env_vars() or MOCK_ENV_VARS
+    client = TestMidjourneyClient(*_client_args(env_vars))
+    
+    # The grid generates but the upscale iterator yields nothing
+    client.generate = _returns(TestGenerationResult(
+        success=True,
+        message_id="mock_message_id_123",
+        image_url="https://example.com/mock_image.png"
+    ))
+    client.iter_upscale_variants = _yields([])
+    
+    # Run a single test
+    result = await run_single_test(
+        client=client,
+        prompt="test prompt for mock run",
+        test_id="mock_test_empty",
+        save_images=False,
+        verbose=False
+    )
+    
+    # Check results
+    assert result["success"] is False
+    assert result["generation_success"] is True
+    assert result["upscale_total"] == 0
+    assert result["upscale_success_rate"] == 0.0
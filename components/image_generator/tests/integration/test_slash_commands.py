@@ -8,7 +8,6 @@ Discord slash commands with the Midjourney client.
 
 import os
 import sys
-import json
 import pytest
 import pytest_asyncio
 from unittest.mock import patch, MagicMock, AsyncMock
@@ -77,16 +76,16 @@ async def mock_rate_limiter(mock_client):
     mock_client.rate_limiter.with_retry = original_with_retry
 
 @pytest.mark.asyncio
-async def test_imagine_command_format(mock_rate_limiter, monkeypatch):
+async def test_imagine_command_format(mock_rate_limiter, monkeypatch, mock_response_factory):
     """Test the format of the /imagine command payload"""
     client = mock_rate_limiter
     
     # Mock the requests.post method
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {'id': 'response_id', 'type': 4}
-    mock_response.text = json.dumps({'id': 'response_id', 'type': 4})
-    mock_response.headers = {'Content-Type': 'application/json', 'X-RateLimit-Remaining': '10'}
+    mock_response = mock_response_factory(
+        status=200,
+        body={'id': 'response_id', 'type': 4},
+        headers={'Content-Type': 'application/json', 'X-RateLimit-Remaining': '10'}
+    )
     
     # Configure the mock to return the response
     mock_post = MagicMock(return_value=mock_response)
@@ -123,16 +122,16 @@ async def test_imagine_command_format(mock_rate_limiter, monkeypatch):
     assert command_data['options'][0]['value'] == prompt
 
 @pytest.mark.asyncio
-async def test_slash_command_with_options(mock_rate_limiter, monkeypatch):
+async def test_slash_command_with_options(mock_rate_limiter, monkeypatch, mock_response_factory):
     """Test a slash command with multiple options"""
     client = mock_rate_limiter
     
     # Mock the requests.post method
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {'id': 'response_id', 'type': 4}
-    mock_response.text = json.dumps({'id': 'response_id', 'type': 4})
-    mock_response.headers = {'Content-Type': 'application/json', 'X-RateLimit-Remaining': '10'}
+    mock_response = mock_response_factory(
+        status=200,
+        body={'id': 'response_id', 'type': 4},
+        headers={'Content-Type': 'application/json', 'X-RateLimit-Remaining': '10'}
+    )
     
     # Configure the mock to return the response
     mock_post = MagicMock(return_value=mock_response)
@@ -178,16 +177,13 @@ async def test_slash_command_with_options(mock_rate_limiter, monkeypatch):
     assert command_data['options'][1]['value'] == 'raw'
 
 @pytest.mark.asyncio
-async def test_handling_slash_command_response(mock_rate_limiter, monkeypatch):
+async def test_handling_slash_command_response(mock_rate_limiter, monkeypatch, mock_response_factory):
     """Test handling of slash command responses"""
     client = mock_rate_limiter
     
     # Mock the requests.post method
-    mock_response = MagicMock()
-    mock_response.status_code = 204  # Discord usually returns 204 for successful interactions
-    mock_response.json.return_value = {}
-    mock_response.text = ""
-    mock_response.headers = {'X-RateLimit-Remaining': '10'}
+    # Discord usually returns 204 for successful interactions
+    mock_response = mock_response_factory(status=204)
     
     # Configure the mock to return the response
     mock_post = MagicMock(return_value=mock_response)
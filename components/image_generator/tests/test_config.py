@@ -9,6 +9,9 @@ Central configuration for all Midjourney tests, including:
 - Timing parameters
 """
 
+import functools
+from types import MappingProxyType
+
 # Model version options
 MODEL_VERSIONS = {
     "v6": "--v 6",
@@ -63,7 +66,7 @@ TIMING = {
     "upscale_timeout": 300,         # Maximum time to wait for upscale (5 mins)
     "poll_interval_short": 3,       # Short polling interval 
     "poll_interval_long": 20,       # Longer polling interval
-    "delay_between_tests": 60,      # Delay between test runs to avoid rate limits
+    "delay_between_tests": 60,      # Minimum spacing between test starts to avoid rate limits
     "reconnect_delay": 5            # Delay before attempting reconnection
 }
 
@@ -82,10 +85,14 @@ BATCH_SIZES = {
 }
 
 # Combine parameters to form complete test cases
+@functools.lru_cache(maxsize=256)
 def get_test_cases(category="simple", count=3, model="v6", aspect_ratio=None):
     """
     Generate test cases with the specified parameters
     
+    Results are cached per argument combination, so they are returned as
+    read-only mappings in a tuple.
+    
     Args:
         category: The prompt category to use
         count: Number of prompts to return
@@ -93,26 +100,22 @@ def get_test_cases(category="simple", count=3, model="v6", aspect_ratio=None):
         aspect_ratio: Aspect ratio to use (or None for default)
     
     Returns:
-        List of test case dictionaries
+        Tuple of test case mappings
     """
     prompts = BASE_PROMPTS.get(category, BASE_PROMPTS["simple"])
     selected_prompts = prompts[:min(count, len(prompts))]
     
-    test_cases = []
-    for prompt in selected_prompts:
-        test_case = {
-            "base_prompt": prompt,
-            "model_version": MODEL_VERSIONS[model],
-            "aspect_ratio": ASPECT_RATIOS.get(aspect_ratio, "") if aspect_ratio else "",
-        }
-        
-        # Build the full prompt with parameters
-        full_prompt = prompt
-        if aspect_ratio:
-            full_prompt += f" {ASPECT_RATIOS[aspect_ratio]}"
-        full_prompt += f" {MODEL_VERSIONS[model]}"
-        
-        test_case["full_prompt"] = full_prompt
-        test_cases.append(test_case)
+    # The parameters are the same for every prompt, so build them once
+    model_version = MODEL_VERSIONS[model]
+    aspect_ratio_param = ASPECT_RATIOS[aspect_ratio] if aspect_ratio else ""
+    suffix = f" {aspect_ratio_param} {model_version}" if aspect_ratio else f" {model_version}"
     
-    return test_cases 
\ No newline at end of file
+    return tuple(
+        MappingProxyType({
+            "base_prompt": prompt,
+            "model_version": model_version,
+            "aspect_ratio": aspect_ratio_param,
+            "full_prompt": f"{prompt}{suffix}"
+        })
+        for prompt in selected_prompts
+    ) 
\ No newline at end of file
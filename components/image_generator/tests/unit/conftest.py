@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Pytest configuration for the image_generator unit tests.
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+# Make both `src.*` and bare module imports resolvable, once per session
+_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_src = os.path.join(_root, 'src')
+for _path in (_src, _root):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+
+class MockDatabaseService:
+    """Mock for the old DatabaseService class"""
+    def __init__(self):
+        self.fs = MagicMock()
+    
+    def save_generation(self, *args, **kwargs):
+        return True
+
+
+@pytest.fixture(scope="module")
+def mock_db_service():
+    """Build the mock database service once per module"""
+    return MockDatabaseService()
+
+
+@pytest.fixture(scope="session")
+def _client_template():
+    """The mock Midjourney client, built once per session"""
+    return MagicMock()
+
+
+@pytest.fixture(scope="session")
+def _fs_template():
+    """The mock GridFS handle, built once per session"""
+    return MagicMock()
+
+
+@pytest.fixture
+def mock_client(_client_template):
+    """Hand out the shared mock client with its calls and results cleared"""
+    _client_template.reset_mock(return_value=True, side_effect=True)
+    return _client_template
+
+
+@pytest.fixture
+def fs(_fs_template):
+    """Hand out the shared mock GridFS handle with its calls and results cleared"""
+    _fs_template.reset_mock(return_value=True, side_effect=True)
+    return _fs_template
+
+
+@pytest.fixture(scope="session")
+def midjourney_client_cls():
+    """Import MidjourneyClient on first use, skipping the test if it is unavailable"""
+    client_module = pytest.importorskip("src.client", reason="MidjourneyClient not available")
+    return client_module.MidjourneyClient
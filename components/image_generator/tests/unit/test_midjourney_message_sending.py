@@ -3,17 +3,12 @@
 Tests for Midjourney message sending functionality.
 """
 
-import os
 import sys
-import unittest
 import pytest
-from unittest.mock import patch, MagicMock, AsyncMock
+from unittest.mock import MagicMock
 import json
 import asyncio
 
-# Add the parent directory to sys.path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-
 # Skip this test module if we're having import issues
 try:
     from src import MidjourneyClient
@@ -21,45 +16,48 @@ except ImportError:
     print("Skipping test_midjourney_message_sending due to import issues")
     sys.exit(0)
 
-class TestMidjourneyMessageSending(unittest.TestCase):
-    """Tests for Midjourney message sending functionality"""
+class _Resolved:
+    """An awaitable that resolves immediately, reusable on any event loop"""
+    def __init__(self, value):
+        self.value = value
     
-    def setUp(self):
-        """Set up test environment"""
-        # Create mock for discord client
-        self.mock_client = MagicMock()
-        
-        # Create test client with mock
-        self.client = MidjourneyClient(
-            user_token="test_user_token",
-            bot_token="test_bot_token",
-            channel_id="test_channel_id",
-            guild_id="test_guild_id"
-        )
-        
-        # Replace the client's internal methods with mocks
-        # Using setattr to avoid AttributeError
-        setattr(self.client, '_send_message', MagicMock())
-        setattr(self.client, '_send_button_interaction', AsyncMock(return_value=True))
-        setattr(self.client, '_handle_bot_message', MagicMock(return_value=True))
-        setattr(self.client, '_send_imagine_command', AsyncMock(return_value=True))
+    def __await__(self):
+        yield from ()
+        return self.value
+
+# Shared result for the stubbed async client methods
+_DONE_TRUE = _Resolved(True)
+
+@pytest.fixture(scope="module")
+def client():
+    """Create a test client with its internal methods mocked, once per module"""
+    c = MidjourneyClient(
+        user_token="test_user_token",
+        bot_token="test_bot_token",
+        channel_id="test_channel_id",
+        guild_id="test_guild_id"
+    )
     
-    @patch("aiohttp.ClientSession.post")
-    def test_send_command(self, mock_post):
+    # Replace the client's internal methods with mocks
+    c._send_message = MagicMock()
+    c._send_button_interaction = MagicMock(return_value=_DONE_TRUE)
+    c._handle_bot_message = MagicMock(return_value=True)
+    c._send_imagine_command = MagicMock(return_value=_DONE_TRUE)
+    return c
+
+class TestMidjourneyMessageSending:
+    """Tests for Midjourney message sending functionality"""
+    
+    def test_send_command(self, client):
         """Test sending a Discord command interaction"""
-        # Configure the mock
-        mock_response = MagicMock()
-        mock_response.status = 204
-        mock_post.return_value.__aenter__.return_value = mock_response
-        
         # Verify the method exists
-        self.assertTrue(hasattr(self.client, '_send_imagine_command'))
+        assert hasattr(client, '_send_imagine_command')
     
     @pytest.mark.asyncio
-    async def test_generate_image(self):
+    async def test_generate_image(self, client, monkeypatch):
         """Test the generate_image method"""
-        # Configure mocks
-        self.client._send_imagine_command = AsyncMock(return_value=True)
+        # Configure mocks; monkeypatch undoes them so the shared client is untouched
+        monkeypatch.setattr(client, '_send_imagine_command', MagicMock(return_value=_DONE_TRUE))
         
         # Mock the generation_future
         mock_result = {
@@ -70,13 +68,13 @@ class TestMidjourneyMessageSending(unittest.TestCase):
         # Create a completed future
         future = asyncio.Future()
         future.set_result(mock_result)
-        self.client.generation_future = future
+        monkeypatch.setattr(client, 'generation_future', future, raising=False)
         
         # Mock the initialization method
-        self.client.initialize = AsyncMock(return_value=True)
+        monkeypatch.setattr(client, 'initialize', MagicMock(return_value=_DONE_TRUE))
         
         # Verify that the method exists
-        self.assertTrue(hasattr(self.client, 'generate_image'))
+        assert hasattr(client, 'generate_image')
         
         # No need to actually call the method, as we're just testing that it exists
         return None
@@ -5,21 +5,14 @@ Mock Client Tests
 Tests the basic functionality using mock implementations
 """
 
-import os
-import sys
-import uuid
+import secrets
 import pytest
+import pytest_asyncio
 import logging
-from unittest import mock
+from dataclasses import dataclass
 from pathlib import Path
 import asyncio
 
-# Add necessary paths
-current_dir = os.path.dirname(os.path.abspath(__file__))
-src_dir = os.path.join(os.path.dirname(os.path.dirname(current_dir)), 'src')
-if src_dir not in sys.path:
-    sys.path.insert(0, src_dir)
-
 # Shared model classes for testing
 class GenerationResult:
     def __init__(self, success=True, grid_message_id=None, image_url=None, error=None):
@@ -35,6 +28,17 @@ class UpscaleResult:
         self.image_url = image_url
         self.error = error
 
+@dataclass(frozen=True)
+class MockGateway:
+    """Stand-in for a Discord gateway; tests only read its session id"""
+    session_id: str = ""
+
+# Message details shared by every mock lookup; callers only read them
+_MESSAGE_DETAILS_TEMPLATE = {
+    "attachments": [{"url": "https://example.com/mock/grid.png"}],
+    "components": [{"components": [{"label": "U1"}, {"label": "U2"}, {"label": "U3"}, {"label": "U4"}]}]
+}
+
 class MockMidjourneyClient:
     """Mock client for testing"""
     def __init__(self, user_token, bot_token, channel_id, guild_id):
@@ -42,9 +46,8 @@ class MockMidjourneyClient:
         self.bot_token = bot_token
         self.channel_id = channel_id
         self.guild_id = guild_id
-        self.user_gateway = mock.MagicMock()
-        self.user_gateway.session_id = f"mock_session_{uuid.uuid4().hex[:8]}"
-        self.bot_gateway = mock.MagicMock()
+        self.user_gateway = MockGateway(session_id=f"mock_session_{secrets.token_hex(4)}")
+        self.bot_gateway = MockGateway()
         
     async def initialize(self):
         """Mock initialization"""
@@ -53,7 +56,7 @@ class MockMidjourneyClient:
     async def generate_image(self, prompt):
         """Mock image generation"""
         # Generate mock data
-        grid_id = f"mock_grid_{uuid.uuid4().hex[:8]}"
+        grid_id = f"mock_grid_{secrets.token_hex(4)}"
         image_url = "https://example.com/mock/grid.png"
         
         return GenerationResult(
@@ -64,75 +67,66 @@ class MockMidjourneyClient:
         
     async def _get_message_details(self, message_id):
         """Mock get message details"""
-        return {
-            "id": message_id,
-            "attachments": [{"url": "https://example.com/mock/grid.png"}],
-            "components": [{"components": [{"label": "U1"}, {"label": "U2"}, {"label": "U3"}, {"label": "U4"}]}]
-        }
+        return {"id": message_id, **_MESSAGE_DETAILS_TEMPLATE}
         
     async def upscale_all_variants(self, grid_message_id):
         """Mock upscaling all variants"""
-        results = []
-        for variant in range(1, 5):
-            results.append(UpscaleResult(
+        async def _upscale_variant(variant):
+            # Yield to the event loop so the variants are actually interleaved
+            await asyncio.sleep(0)
+            return UpscaleResult(
                 success=True,
                 variant=variant,
                 image_url=f"https://example.com/mock/upscale_{variant}.png"
-            ))
-        return results
+            )
+
+        return await asyncio.gather(*(_upscale_variant(variant) for variant in range(1, 5)))
         
     async def close(self):
         """Mock close client"""
         return True
 
 
+@pytest_asyncio.fixture
+async def mock_client():
+    """Provide an initialized mock client and close it afterwards"""
+    client = MockMidjourneyClient(
+        user_token="mock_token",
+        bot_token="mock_bot_token",
+        channel_id="12345",
+        guild_id="67890"
+    )
+    
+    await client.initialize()
+    yield client
+    await client.close()
+
+
 class TestMockClient:
     """Tests for the mock client implementation"""
     
     @pytest.mark.asyncio
-    async def test_mock_client_generate(self):
+    async def test_mock_client_generate(self, mock_client):
         """Test image generation with mock client"""
-        client = MockMidjourneyClient(
-            user_token="mock_token",
-            bot_token="mock_bot_token",
-            channel_id="12345",
-            guild_id="67890"
-        )
-        
-        await client.initialize()
-        
         # Generate an image
-        result = await client.generate_image("Test prompt with landscape")
+        result = await mock_client.generate_image("Test prompt with landscape")
         
         assert result.success is True
         assert result.grid_message_id is not None
         assert result.image_url is not None
-        
-        await client.close()
 
     @pytest.mark.asyncio
-    async def test_mock_client_upscale(self):
+    async def test_mock_client_upscale(self, mock_client):
         """Test upscaling with mock client"""
-        client = MockMidjourneyClient(
-            user_token="mock_token",
-            bot_token="mock_bot_token",
-            channel_id="12345",
-            guild_id="67890"
-        )
-        
-        await client.initialize()
-        
         # Test upscale
-        grid_id = f"mock_grid_{uuid.uuid4().hex[:8]}"
-        results = await client.upscale_all_variants(grid_id)
+        grid_id = f"mock_grid_{secrets.token_hex(4)}"
+        results = await mock_client.upscale_all_variants(grid_id)
         
         assert len(results) == 4
         for i, result in enumerate(results, 1):
             assert result.success is True
             assert result.variant == i
             assert result.image_url is not None
-        
-        await client.close()
 
     def test_generation_result(self):
         """Test GenerationResult model"""
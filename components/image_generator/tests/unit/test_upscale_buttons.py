@@ -1,318 +1,290 @@
 #!/usr/bin/env python3
 """Test the upscale button detection and handling functionality."""
 
-import unittest
-import sys
-import os
 import json
 import re
-from unittest.mock import MagicMock, patch
+import sys
+from itertools import chain
+from types import MappingProxyType
+import pytest
+from unittest.mock import MagicMock
 
-# Add the src directory to the path so we can import our modules
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+# Discord messages for the button tests, built once at import and read-only
+# so a test cannot mutate them for the next one
 
-# Import the real client
-from src.client import MidjourneyClient
+# A message with traditional U1-U4 upscale buttons.
+_TRADITIONAL_MSG = MappingProxyType({
+    "id": "123456789",
+    "content": "Test message",
+    "components": (
+        {
+            "type": 1,
+            "components": (
+                {
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::1::123456789",
+                    "label": "U1"
+                },
+                {
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::2::123456789",
+                    "label": "U2"
+                },
+            )
+        },
+        {
+            "type": 1,
+            "components": (
+                {
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::3::123456789",
+                    "label": "U3"
+                },
+                {
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::4::123456789",
+                    "label": "U4"
+                },
+            )
+        },
+    )
+})
 
-class TestUpscaleButtons(unittest.TestCase):
-    """Test the upscale button detection and handling functionality."""
-    
-    def setUp(self):
-        """Set up test environment."""
-        # Create a mock for the Discord client
-        self.discord_session = MagicMock()
-        
-        # Create client instance with mock session
-        self.client = MidjourneyClient(
-            user_token="mock_token",
-            bot_token="mock_token",
-            channel_id="123456789",
-            guild_id="123456789"
-        )
-        
-        # Add the _get_upscale_buttons method for testing
-        self.client._get_upscale_buttons = self._mock_get_upscale_buttons
-        
-        # Add the re module to the client since it's used in _get_upscale_buttons
-        if not hasattr(self.client, 're'):
-            self.client.re = re
-    
-    def _mock_get_upscale_buttons(self, message):
-        """Mock implementation of _get_upscale_buttons for testing purposes."""
-        buttons = []
-        
-        # Extract all upscale buttons from the message components
-        for row in message.get('components', []):
-            for component in row.get('components', []):
-                if component.get('type') == 2:  # Button type
-                    custom_id = component.get('custom_id', '')
-                    label = component.get('label', '')
-                    
-                    # Match classic Midjourney upscale buttons (U1, U2, U3, U4)
-                    if 'upsample' in custom_id or (label and label.startswith('U')):
-                        buttons.append(component)
-        
-        return buttons
-    
-    def test_detect_traditional_upscale_buttons(self):
-        """Test detection of traditional U1-U4 upscale buttons."""
-        # Create a mock message with traditional upscale buttons
-        message = {
-            "id": "123456789",
-            "content": "Test message",
-            "components": [
+# A message with the new style upscale buttons.
+_NEW_STYLE_MSG = MappingProxyType({
+    "id": "123456789",
+    "content": "Test message",
+    "components": (
+        {
+            "type": 1,
+            "components": (
+                {
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::1::123456789",
+                    "label": "U1"
+                },
+                {
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::2::123456789",
+                    "label": "U2"
+                },
+            )
+        },
+        {
+            "type": 1,
+            "components": (
+                {
+                    "type": 2,
+                    "custom_id": "MJ::Outpaint::50::123456789",
+                    "label": "Zoom Out 2x"
+                },
+                {
+                    "type": 2,
+                    "custom_id": "MJ::Custom::123456789",
+                    "label": "Custom Zoom"
+                },
+            )
+        },
+    )
+})
+
+# A message with numbered upscale buttons.
+_NUMBERED_MSG = MappingProxyType({
+    "id": "123456789",
+    "content": "Test message",
+    "components": (
+        {
+            "type": 1,
+            "components": (
+                {
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::1::123456789",
+                    "label": "U1"
+                },
+                {
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::2::123456789",
+                    "label": "U2"
+                },
+            )
+        },
+        {
+            "type": 1,
+            "components": (
                 {
-                    "type": 1,
-                    "components": [
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::1::123456789",
-                            "label": "U1"
-                        },
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::2::123456789",
-                            "label": "U2"
-                        }
-                    ]
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::3::123456789",
+                    "label": "U3"
                 },
                 {
-                    "type": 1,
-                    "components": [
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::3::123456789",
-                            "label": "U3"
-                        },
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::4::123456789",
-                            "label": "U4"
-                        }
-                    ]
-                }
-            ]
-        }
-        
-        # Mock the logging to avoid errors
-        with patch('src.client.logging') as mock_logging:
-            # Get the upscale buttons
-            buttons = self.client._get_upscale_buttons(message)
-            
-            # Verify we found 4 upscale buttons
-            self.assertEqual(len(buttons), 4)
-            
-            # Check that each button has the expected properties based on actual implementation
-            for i, button in enumerate(buttons):
-                self.assertIn('custom_id', button)
-                self.assertIn('label', button)
-                # The label should match the Ui format (U1, U2, U3, U4)
-                expected_label = f"U{i+1}"
-                self.assertEqual(button['label'], expected_label)
-        
-    def test_detect_new_style_upscale_buttons(self):
-        """Test detection of new-style 'Upscale (Subtle)' and 'Upscale (Creative)' buttons."""
-        # Create a mock message with the new style upscale buttons
-        message = {
-            "id": "123456789",
-            "content": "Test message",
-            "components": [
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::4::123456789",
+                    "label": "U4"
+                },
+            )
+        },
+    )
+})
+
+# A message with no upscale buttons.
+_NO_UPSCALE_MSG = MappingProxyType({
+    "id": "123456789",
+    "content": "Test message",
+    "components": (
+        {
+            "type": 1,
+            "components": (
                 {
-                    "type": 1,
-                    "components": [
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::1::123456789",
-                            "label": "U1"  # Changed to match implementation
-                        },
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::2::123456789",
-                            "label": "U2"  # Changed to match implementation
-                        }
-                    ]
+                    "type": 2,
+                    "custom_id": "MJ::OTHER::123456789",
+                    "label": "Other Button"
                 },
+            )
+        },
+    )
+})
+
+# A message whose custom_id starts with U and whose label mentions upsample,
+# neither of which makes an upscale button.
+_LOOKALIKE_MSG = MappingProxyType({
+    "id": "123456789",
+    "content": "Test message",
+    "components": (
+        {
+            "type": 1,
+            "components": (
                 {
-                    "type": 1,
-                    "components": [
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::Outpaint::50::123456789",
-                            "label": "Zoom Out 2x"
-                        },
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::Custom::123456789",
-                            "label": "Custom Zoom"
-                        }
-                    ]
-                }
-            ]
-        }
-        
-        # Mock the logging to avoid errors
-        with patch('src.client.logging') as mock_logging:
-            # Get the upscale buttons
-            buttons = self.client._get_upscale_buttons(message)
-            
-            # Verify we found 2 upscale buttons
-            self.assertEqual(len(buttons), 2)
-            
-            # Check that the basic properties are present
-            self.assertIn('custom_id', buttons[0])
-            self.assertIn('label', buttons[0])
-            self.assertIn('custom_id', buttons[1])
-            self.assertIn('label', buttons[1])
-            
-            # Check that the custom IDs are preserved
-            self.assertEqual(buttons[0].get('custom_id'), "MJ::JOB::upsample::1::123456789")
-            self.assertEqual(buttons[1].get('custom_id'), "MJ::JOB::upsample::2::123456789")
-        
-    def test_detect_numbered_upscale_buttons(self):
-        """Test detection of numbered upscale buttons (1, 2, 3, 4)."""
-        # Create a mock message with numbered upscale buttons
-        message = {
-            "id": "123456789",
-            "content": "Test message",
-            "components": [
+                    "type": 2,
+                    "custom_id": "U::other",
+                    "label": "Other"
+                },
                 {
-                    "type": 1,
-                    "components": [
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::1::123456789",
-                            "label": "U1"  # Changed to match implementation
-                        },
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::2::123456789",
-                            "label": "U2"  # Changed to match implementation
-                        }
-                    ]
+                    "type": 2,
+                    "custom_id": "MJ::OTHER::123456789",
+                    "label": "upsample-ish"
                 },
+            )
+        },
+    )
+})
+
+# A message with mixed button types.
+_MIXED_MSG = MappingProxyType({
+    "id": "123456789",
+    "content": "Test message",
+    "components": (
+        {
+            "type": 1,
+            "components": (
                 {
-                    "type": 1,
-                    "components": [
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::3::123456789",
-                            "label": "U3"  # Changed to match implementation
-                        },
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::4::123456789",
-                            "label": "U4"  # Changed to match implementation
-                        }
-                    ]
-                }
-            ]
-        }
-        
-        # Mock the logging to avoid errors
-        with patch('src.client.logging') as mock_logging:
-            # Get the upscale buttons
-            buttons = self.client._get_upscale_buttons(message)
-            
-            # Verify we found 4 upscale buttons
-            self.assertEqual(len(buttons), 4)
-            
-            # Check that the basic properties are present
-            for i, button in enumerate(buttons):
-                self.assertIn('custom_id', button)
-                self.assertIn('label', button)
-            
-            # Check that the custom IDs are preserved
-            self.assertEqual(buttons[0].get('custom_id'), "MJ::JOB::upsample::1::123456789")
-            self.assertEqual(buttons[1].get('custom_id'), "MJ::JOB::upsample::2::123456789")
-            self.assertEqual(buttons[2].get('custom_id'), "MJ::JOB::upsample::3::123456789")
-            self.assertEqual(buttons[3].get('custom_id'), "MJ::JOB::upsample::4::123456789")
-        
-    def test_no_upscale_buttons(self):
-        """Test handling when no upscale buttons are found."""
-        # Create a mock message with no upscale buttons
-        message = {
-            "id": "123456789",
-            "content": "Test message",
-            "components": [
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::1::123456789",
+                    "label": "U1"
+                },
                 {
-                    "type": 1,
-                    "components": [
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::OTHER::123456789",
-                            "label": "Other Button"
-                        }
-                    ]
-                }
-            ]
-        }
-        
-        # Mock the logging to avoid errors
-        with patch('src.client.logging') as mock_logging:
-            # Get the upscale buttons
-            buttons = self.client._get_upscale_buttons(message)
-            
-            # Verify we found no upscale buttons (empty list)
-            self.assertEqual(len(buttons), 0)
-        
-    def test_mixed_button_types(self):
-        """Test handling a mix of button types."""
-        # Create a mock message with mixed button types
-        message = {
-            "id": "123456789",
-            "content": "Test message",
-            "components": [
+                    "type": 2,
+                    "custom_id": "MJ::JOB::variation::1::123456789",
+                    "label": "Variation"
+                },
+            )
+        },
+        {
+            "type": 1,
+            "components": (
                 {
-                    "type": 1,
-                    "components": [
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::1::123456789",
-                            "label": "U1"  # Changed to match implementation
-                        },
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::variation::1::123456789",
-                            "label": "Variation"
-                        }
-                    ]
+                    "type": 2,
+                    "custom_id": "MJ::JOB::reroll::123456789",
+                    "label": "Reroll"
                 },
                 {
-                    "type": 1,
-                    "components": [
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::reroll::123456789",
-                            "label": "Reroll"
-                        },
-                        {
-                            "type": 2,
-                            "custom_id": "MJ::JOB::upsample::2::123456789",
-                            "label": "U2"  # Changed to match implementation
-                        }
-                    ]
-                }
-            ]
-        }
-        
-        # Mock the logging to avoid errors
-        with patch('src.client.logging') as mock_logging:
-            # Get the upscale buttons
-            buttons = self.client._get_upscale_buttons(message)
-            
-            # Verify we found 2 upscale buttons
-            self.assertEqual(len(buttons), 2)
-            
-            # Check that the basic properties are present
-            self.assertIn('custom_id', buttons[0])
-            self.assertIn('label', buttons[0])
-            self.assertIn('custom_id', buttons[1])
-            self.assertIn('label', buttons[1])
-            
-            # Check that the custom IDs are preserved
-            self.assertEqual(buttons[0].get('custom_id'), "MJ::JOB::upsample::1::123456789")
-            self.assertEqual(buttons[1].get('custom_id'), "MJ::JOB::upsample::2::123456789")
+                    "type": 2,
+                    "custom_id": "MJ::JOB::upsample::2::123456789",
+                    "label": "U2"
+                },
+            )
+        },
+    )
+})
+
+
+def _mock_get_upscale_buttons(message):
+    """Mock implementation of _get_upscale_buttons for testing purposes."""
+    # Flatten the button rows of the message components
+    components = chain.from_iterable(
+        row.get('components') or () for row in message.get('components') or ()
+    )
+    
+    # Gate on the button type (2) before touching any ids or labels
+    buttons = (component for component in components if component.get('type') == 2)
+    
+    # Keep the classic Midjourney upscale buttons (U1, U2, U3, U4): an
+    # upsample custom_id or a label starting with U
+    return [
+        button for button in buttons
+        if 'upsample' in (button.get('custom_id') or '')
+        or (button.get('label') or '').startswith('U')
+    ]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _silence_client_logging(midjourney_client_cls):
+    """Swap out the client's logging module once for all tests in this module."""
+    client_module = sys.modules[midjourney_client_cls.__module__]
+    original = client_module.logging
+    client_module.logging = MagicMock()
+    yield
+    client_module.logging = original
+
+
+@pytest.fixture(scope="module")
+def client(midjourney_client_cls):
+    """Create the client once per module; no test mutates it."""
+    c = midjourney_client_cls(
+        user_token="mock_token",
+        bot_token="mock_token",
+        channel_id="123456789",
+        guild_id="123456789"
+    )
+    
+    # Add the _get_upscale_buttons method for testing
+    c._get_upscale_buttons = _mock_get_upscale_buttons
+    
+    # Add the re module to the client since it's used in _get_upscale_buttons
+    c.re = re
+    return c
+
+
+def _upsample(variant):
+    """The (custom_id, label) pair of a classic U<n> upscale button."""
+    return (f"MJ::JOB::upsample::{variant}::123456789", f"U{variant}")
+
+
+@pytest.mark.parametrize("message, expected_buttons", [
+    (_TRADITIONAL_MSG, [_upsample(1), _upsample(2), _upsample(3), _upsample(4)]),
+    (_NEW_STYLE_MSG, [_upsample(1), _upsample(2)]),
+    (_NUMBERED_MSG, [_upsample(1), _upsample(2), _upsample(3), _upsample(4)]),
+    (_MIXED_MSG, [_upsample(1), _upsample(2)]),
+], ids=["traditional", "new_style", "numbered", "mixed"])
+def test_detect_upscale_buttons(client, message, expected_buttons):
+    """Test that only the upscale buttons are detected, in order, with their ids and labels preserved."""
+    # Get the upscale buttons
+    buttons = client._get_upscale_buttons(message)
+    
+    assert [(button['custom_id'], button['label']) for button in buttons] == expected_buttons
+
+
+@pytest.mark.parametrize("message", [
+    _NO_UPSCALE_MSG,
+    _LOOKALIKE_MSG,
+], ids=["no_upscale", "lookalike"])
+def test_no_upscale_buttons(client, message):
+    """Test handling when no upscale buttons are found."""
+    # Get the upscale buttons
+    buttons = client._get_upscale_buttons(message)
+    
+    # Verify we found no upscale buttons (empty list)
+    assert len(buttons) == 0
 
 
 if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+    pytest.main([__file__])
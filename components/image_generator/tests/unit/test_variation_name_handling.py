@@ -6,24 +6,15 @@ This test focuses specifically on ensuring that the 'type' parameter is
 correctly included in the options passed to _process_variation.
 """
 
-import os
-import sys
-import unittest
 from unittest.mock import MagicMock, patch
+from uuid import UUID
 
-# Add the src directory to the Python path
-src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
-sys.path.insert(0, src_dir)
+import pytest
 
-# Mock the old classes
-class MockDatabaseService:
-    """Mock replacement for the old DatabaseService"""
-    def __init__(self):
-        self.fs = MagicMock()
-    
-    def save_generation(self, *args, **kwargs):
-        return True
+# Set up a test post ID
+POST_ID = "test_post_id"
 
+# Mock the old classes
 class MockGenerationService:
     """Mock replacement for the old GenerationService"""
     DEFAULT_VARIATIONS = [
@@ -53,191 +44,121 @@ class MockGenerationService:
         
         return True
 
-class TestVariationNameHandling(unittest.TestCase):
+
+@pytest.fixture(scope="module", autouse=True)
+def _no_sleep_no_uuid():
+    """Stub out sleep and uuid4 once for all tests in this module"""
+    with pytest.MonkeyPatch.context() as mp:
+        # Avoid delays and randomness
+        mp.setattr('time.sleep', lambda *_: None)
+        mp.setattr('uuid.uuid4', lambda: UUID(int=0))
+        yield
+
+
+@pytest.fixture(scope="module")
+def service(mock_db_service):
+    """Create the service instance once per module"""
+    service = MockGenerationService(database_service=mock_db_service)
     
-    def setUp(self):
-        """Set up the test environment"""
-        # Create a mock database service
-        self.db_service = MockDatabaseService()
-        
-        # Create the service instance with the mock
-        self.service = MockGenerationService(database_service=self.db_service)
-        
-        # Set up a test post ID
-        self.post_id = "test_post_id"
-        
-        # Mock the _process_variation method to record calls
-        self.process_variation_calls = []
-        self.original_process_variation = self.service._process_variation
-        
-        def mock_process_variation(post_id, variation_options):
-            # Record the call parameters
-            self.process_variation_calls.append({
-                'post_id': post_id,
-                'variation_options': variation_options.copy()  # Make a copy to avoid references
-            })
-            # Don't actually execute the method
-            return True
-        
-        # Replace the method with our mock
-        self.service._process_variation = mock_process_variation
-        
-        # Mock other methods that might make external calls
-        self.service._prepare_prompt = MagicMock(return_value="Test prompt")
-        self.service.provider = MagicMock()
-    
-    def tearDown(self):
-        """Clean up after the test"""
-        # Restore the original method if needed
-        if hasattr(self, 'original_process_variation'):
-            self.service._process_variation = self.original_process_variation
-    
-    @patch('uuid.uuid4')  # Mock uuid4 to avoid randomness
-    @patch('time.sleep')  # Mock sleep to avoid delays
-    def test_niji_variation_name(self, mock_sleep, mock_uuid):
-        """Test that correct parameters are passed for niji variation"""
-        # Set up test variations
-        variations = [
-            {'type': 'niji', 'count': 4}
-        ]
-        
-        # Call generate_images with the niji variation
-        with patch.object(self.service, 'provider'):
-            self.service.generate_images(
-                post_id=self.post_id,
-                description="Test prompt",
-                variations=variations
-            )
-        
-        # Verify _process_variation was called
-        self.assertEqual(len(self.process_variation_calls), 1, 
-                        "Expected 1 call to _process_variation, but got different number")
-        
-        # Get the options from the call
-        call = self.process_variation_calls[0]
-        options = call['variation_options']
-        
-        # Verify the post_id was passed correctly
-        self.assertEqual(call['post_id'], self.post_id, 
-                        f"Expected post_id {self.post_id}, but got {call['post_id']}")
-        
-        # Verify 'type' is in the options
-        self.assertIn('type', options, 
-                     f"'type' is missing from options: {options}")
-        
-        # Verify 'type' has the correct value
-        self.assertEqual(options['type'], 'niji', 
-                        f"Expected type 'niji', but got {options['type']}")
-    
-    @patch('uuid.uuid4')  # Mock uuid4 to avoid randomness
-    @patch('time.sleep')  # Mock sleep to avoid delays
-    def test_v6_0_variation_name(self, mock_sleep, mock_uuid):
-        """Test that correct parameters are passed for v6.0 variation"""
-        # Set up test variations
-        variations = [
-            {'type': 'v6.0', 'count': 4}
-        ]
-        
-        # Call generate_images with the v6.0 variation
-        with patch.object(self.service, 'provider'):
-            self.service.generate_images(
-                post_id=self.post_id,
-                description="Test prompt",
-                variations=variations
-            )
-        
-        # Verify _process_variation was called
-        self.assertEqual(len(self.process_variation_calls), 1, 
-                        "Expected 1 call to _process_variation, but got different number")
-        
-        # Get the options from the call
-        call = self.process_variation_calls[0]
-        options = call['variation_options']
-        
-        # Verify 'type' is in the options
-        self.assertIn('type', options, 
-                     f"'type' is missing from options: {options}")
-        
-        # Verify 'type' has the correct value
-        self.assertEqual(options['type'], 'v6.0', 
-                        f"Expected type 'v6.0', but got {options['type']}")
-    
-    @patch('uuid.uuid4')  # Mock uuid4 to avoid randomness
-    @patch('time.sleep')  # Mock sleep to avoid delays
-    def test_v6_1_variation_name(self, mock_sleep, mock_uuid):
-        """Test that correct parameters are passed for v6.1 variation"""
-        # Set up test variations
-        variations = [
-            {'type': 'v6.1', 'count': 4}
-        ]
-        
-        # Call generate_images with the v6.1 variation
-        with patch.object(self.service, 'provider'):
-            self.service.generate_images(
-                post_id=self.post_id,
-                description="Test prompt",
-                variations=variations
-            )
-        
-        # Verify _process_variation was called
-        self.assertEqual(len(self.process_variation_calls), 1, 
-                        "Expected 1 call to _process_variation, but got different number")
-        
-        # Get the options from the call
-        call = self.process_variation_calls[0]
+    # Mock other methods that might make external calls
+    service._prepare_prompt = MagicMock(return_value="Test prompt")
+    service.provider = MagicMock()
+    return service
+
+
+@pytest.fixture(autouse=True)
+def process_variation_calls(service):
+    """Record the _process_variation calls of a single test"""
+    calls = []
+    original_process_variation = service._process_variation
+    
+    def mock_process_variation(post_id, variation_options):
+        # Record the call parameters
+        calls.append({
+            'post_id': post_id,
+            'variation_options': variation_options.copy()  # Make a copy to avoid references
+        })
+        # Don't actually execute the method
+        return True
+    
+    # Replace the method with our mock
+    service._process_variation = mock_process_variation
+    yield calls
+    
+    # Restore the original method
+    service._process_variation = original_process_variation
+
+
+@pytest.mark.parametrize("vtype", ["niji", "v6.0", "v6.1"])
+def test_single_variation_name(service, process_variation_calls, vtype):
+    """Test that correct parameters are passed for a single niji, v6.0 or v6.1 variation"""
+    # Call generate_images with just this variation
+    with patch.object(service, 'provider'):
+        service.generate_images(
+            post_id=POST_ID,
+            description="Test prompt",
+            variations=[{'type': vtype, 'count': 4}]
+        )
+    
+    # Verify _process_variation was called
+    assert len(process_variation_calls) == 1, \
+        "Expected 1 call to _process_variation, but got different number"
+    
+    # Get the options from the call
+    call = process_variation_calls[0]
+    options = call['variation_options']
+    
+    # Verify the post_id was passed correctly
+    assert call['post_id'] == POST_ID, \
+        f"Expected post_id {POST_ID}, but got {call['post_id']}"
+    
+    # Verify 'type' is in the options
+    assert 'type' in options, \
+        f"'type' is missing from options: {options}"
+    
+    # Verify 'type' has the correct value
+    assert options['type'] == vtype, \
+        f"Expected type '{vtype}', but got {options['type']}"
+
+
+def test_default_variations(service, process_variation_calls):
+    """Test that correct parameters are passed when using default variations"""
+    # Call generate_images without specifying variations
+    # This should use the default set of variations
+    with patch.object(service, 'provider'):
+        service.generate_images(
+            post_id=POST_ID,
+            description="Test prompt"
+        )
+    
+    # Verify _process_variation was called 3 times (once for each default variation)
+    assert len(process_variation_calls) == 3, \
+        "Expected 3 calls to _process_variation, but got different number"
+    
+    # Track which variation types we've seen
+    variation_types = set()
+    
+    # Check each call
+    for call in process_variation_calls:
         options = call['variation_options']
         
         # Verify 'type' is in the options
-        self.assertIn('type', options, 
-                     f"'type' is missing from options: {options}")
-        
-        # Verify 'type' has the correct value
-        self.assertEqual(options['type'], 'v6.1', 
-                        f"Expected type 'v6.1', but got {options['type']}")
-    
-    @patch('uuid.uuid4')  # Mock uuid4 to avoid randomness
-    @patch('time.sleep')  # Mock sleep to avoid delays
-    def test_default_variations(self, mock_sleep, mock_uuid):
-        """Test that correct parameters are passed when using default variations"""
-        # Call generate_images without specifying variations
-        # This should use the default set of variations
-        with patch.object(self.service, 'provider'):
-            self.service.generate_images(
-                post_id=self.post_id,
-                description="Test prompt"
-            )
-        
-        # Verify _process_variation was called 3 times (once for each default variation)
-        self.assertEqual(len(self.process_variation_calls), 3, 
-                        "Expected 3 calls to _process_variation, but got different number")
-        
-        # Track which variation types we've seen
-        variation_types = set()
-        
-        # Check each call
-        for call in self.process_variation_calls:
-            options = call['variation_options']
-            
-            # Verify 'type' is in the options
-            self.assertIn('type', options, 
-                         f"'type' is missing from options: {options}")
-            
-            # Add the type to our seen set
-            variation_types.add(options['type'])
-            
-            # Verify the options are correct based on the type
-            if options['type'] == 'niji':
-                pass  # No specific assertions needed beyond checking type
-            elif options['type'] == 'v6.0':
-                pass  # No specific assertions needed beyond checking type
-            elif options['type'] == 'v6.1':
-                pass  # No specific assertions needed beyond checking type
-            else:
-                self.fail(f"Unexpected variation type: {options['type']}")
-        
-        # Verify we saw all three variations
-        self.assertEqual(variation_types, {'niji', 'v6.0', 'v6.1'}, 
-                        f"Expected to see all three variations, but got {variation_types}")
-
-if __name__ == "__main__":
-    unittest.main() 
\ No newline at end of file
+        assert 'type' in options, \
+            f"'type' is missing from options: {options}"
+        
+        # Add the type to our seen set
+        variation_types.add(options['type'])
+        
+        # Verify the options are correct based on the type
+        if options['type'] == 'niji':
+            pass  # No specific assertions needed beyond checking type
+        elif options['type'] == 'v6.0':
+            pass  # No specific assertions needed beyond checking type
+        elif options['type'] == 'v6.1':
+            pass  # No specific assertions needed beyond checking type
+        else:
+            pytest.fail(f"Unexpected variation type: {options['type']}")
+    
+    # Verify we saw all three variations
+    assert variation_types == {'niji', 'v6.0', 'v6.1'}, \
+        f"Expected to see all three variations, but got {variation_types}"
@@ -16,8 +16,16 @@ from typing import Dict, Any, List, Optional, Tuple, Union, Set
 import aiohttp
 import uuid
 from pathlib import Path
+from types import MappingProxyType
 import string
 
+# Optional faster JSON encoder for result files
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -143,6 +151,22 @@ def generate_mock_gateway_data(event_type: str, message: Dict[str, Any]) -> Dict
     }
 
 # Environment utilities
+# Environment variables required for testing
+REQUIRED_ENV_VARS = (
+    "DISCORD_CHANNEL_ID",
+    "DISCORD_GUILD_ID",
+    "DISCORD_BOT_TOKEN",
+    "DISCORD_USER_TOKEN"
+)
+
+# Values used when FULLY_MOCKED=true (read-only; load_env_vars returns a copy)
+MOCK_ENV_VARS = MappingProxyType({
+    "DISCORD_USER_TOKEN": "mock_user_token",
+    "DISCORD_BOT_TOKEN": "mock_bot_token",
+    "DISCORD_CHANNEL_ID": "1234567890",
+    "DISCORD_GUILD_ID": "0987654321"
+})
+
 def load_env_vars() -> Dict[str, str]:
     """
     Load environment variables required for testing
@@ -150,21 +174,11 @@ def load_env_vars() -> Dict[str, str]:
     Returns:
         Dictionary of environment variables
     """
-    required_vars = [
-        "DISCORD_CHANNEL_ID",
-        "DISCORD_GUILD_ID",
-        "DISCORD_BOT_TOKEN",
-        "DISCORD_USER_TOKEN"
-    ]
+    required_vars = REQUIRED_ENV_VARS
     
     # If FULLY_MOCKED=true, use mock values
     if os.environ.get("FULLY_MOCKED", "").lower() == "true":
-        return {
-            "DISCORD_USER_TOKEN": "mock_user_token",
-            "DISCORD_BOT_TOKEN": "mock_bot_token",
-            "DISCORD_CHANNEL_ID": "1234567890",
-            "DISCORD_GUILD_ID": "0987654321"
-        }
+        return dict(MOCK_ENV_VARS)
     
     # Check if all variables are present
     missing = [var for var in required_vars if not os.environ.get(var)]
@@ -200,12 +214,33 @@ def save_test_results(test_name: str, results: Dict[str, Any], output_dir: Optio
     filename = f"{test_name}_{timestamp}.json"
     filepath = os.path.join(output_dir, filename)
     
-    with open(filepath, "w") as f:
-        json.dump(results, f, indent=2)
+    if ORJSON_AVAILABLE:
+        with open(filepath, "wb") as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(filepath, "w") as f:
+            json.dump(results, f, indent=2)
     
     logger.info(f"Test results saved to {filepath}")
     return filepath
 
+def append_test_result(filepath: str, result: Dict[str, Any]) -> None:
+    """
+    Append a single test result to a JSONL file as it completes
+    
+    Args:
+        filepath: Path to the JSONL results file
+        result: Test result dictionary
+    """
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    
+    if ORJSON_AVAILABLE:
+        with open(filepath, "ab") as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE))
+    else:
+        with open(filepath, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
 # Network error simulation
 async def simulate_network_error(duration: float = 5.0):
     """